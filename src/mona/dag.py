@@ -103,7 +103,10 @@ def traverse_execute(
     :param schedule: Schedule the given node for execution
     :param execute: Execute the given node and return new generated nodes
                     with incoming edge from it (run only on scheduled nodes)
-    :param depth: Traverse depth-first if true, breadth-first otherwise
+    :param depth: Traverse depth-first if true, breadth-first otherwise. In
+                  depth-first mode, the most recently scheduled node is also
+                  executed first, so that children run right after their
+                  parents while their data are still at hand.
     :param priority: Priorize steps in order
     """
     visited: Set[_T] = set()
@@ -148,7 +151,7 @@ def traverse_execute(
             executed += 1
         else:
             assert action is Action.EXECUTE
-            node = to_execute.popleft()
+            node = to_execute.pop() if depth else to_execute.popleft()
             yield Step(action, node, progress)
             executing += 1
             try:
@@ -161,12 +164,18 @@ def traverse_execute(
 def traverse(
     start: Iterable[_T], edges_from: Callable[[_T], Iterable[_T]], depth: bool = False
 ) -> Iterator[_T]:
-    """Traverse a DAG, yield visited notes."""
+    """Traverse a DAG, yield visited notes.
+
+    Each node is yielded and expanded only once, even if it is reachable via
+    multiple paths, so the traversal is linear in the size of the DAG.
+    """
     visited: Set[_T] = set()
     queue = Deque[_T]()
     queue.extend(start)
     while queue:
         n = queue.pop() if depth else queue.popleft()
+        if n in visited:
+            continue
         visited.add(n)
         yield n
         queue.extend(m for m in edges_from(n) if m not in visited)
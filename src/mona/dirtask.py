@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import logging
+import os
 import subprocess
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -11,6 +12,7 @@ from typing import (
     ContextManager,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
     Tuple,
@@ -61,6 +63,19 @@ class DirTaskProcessError(subprocess.CalledProcessError):
         )
 
 
+def _files_in(path: Path) -> Iterator[Path]:
+    # same files in same order as path.glob('**/*'), but each directory is
+    # listed once and file types come from the directory entries
+    with os.scandir(path) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.is_file():
+            yield path / entry.name
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _files_in(path / entry.name)
+
+
 class DirtaskTmpdir:
     """Context manager of a temporary directory that collects created files.
 
@@ -91,9 +106,7 @@ class DirtaskTmpdir:
         try:
             if not exc_type:
                 self._outputs: Dict[str, File] = {}
-                for path in self._tmpdir.glob('**/*'):
-                    if not path.is_file():
-                        continue
+                for path in _files_in(self._tmpdir):
                     relpath = str(path.relative_to(self._tmpdir))
                     if self._output_filter and not self._output_filter(relpath):
                         continue
@@ -6,6 +6,7 @@ from __future__ import annotations
 import json
 from abc import ABC, abstractmethod
 from pathlib import Path
+from weakref import WeakKeyDictionary
 from typing import Iterable, List, Optional, Tuple, Type, TypeVar, Union, cast
 
 from .hashing import Hash, Hashed, HashedBytes, HashedComposite, HashResolver
@@ -161,12 +162,20 @@ class File:
         return file
 
 
+# a file passed to many tasks gets a new HashedFile each time, but its content
+# needs to be hashed only once
+_hashed_contents: WeakKeyDictionary[File, HashedBytes] = WeakKeyDictionary()
+
+
 @HashedComposite.register_type(File)
 class HashedFile(Hashed[File]):
     def __init__(self, file: File):
         self._file = file
         if isinstance(file.content, bytes):
-            self._content: Optional[HashedBytes] = HashedBytes(file.content)
+            content = _hashed_contents.get(file)
+            if content is None:
+                content = _hashed_contents[file] = HashedBytes(file.content)
+            self._content: Optional[HashedBytes] = content
             self._content_hash = self._content.hashid
         else:
             self._content = None
@@ -5,7 +5,9 @@ from __future__ import annotations
 
 import hashlib
 import json
+import sys
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import (
     Any,
     Callable,
@@ -43,6 +45,18 @@ def hash_text(text: Union[str, bytes]) -> Hash:
     return Hash(hashlib.sha1(text).hexdigest())
 
 
+def hash_file(path: Path) -> Hash:
+    with path.open('rb') as f:
+        if sys.version_info >= (3, 11):
+            # reads into a preallocated buffer without a Python-level loop
+            hasher = hashlib.file_digest(f, hashlib.sha1)
+        else:
+            hasher = hashlib.sha1()
+            for data in iter(lambda: f.read(2 ** 20), b''):
+                hasher.update(data)
+    return Hash(hasher.hexdigest())
+
+
 class Hashed(ABC, Generic[_T_co]):
     @property
     @abstractmethod
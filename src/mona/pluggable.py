@@ -2,7 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 import logging
-from typing import Any, Dict, Generator, Generic, List, Optional, TypeVar
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
 
 __all__ = ()
 
@@ -13,6 +13,8 @@ _P = TypeVar('_P', bound='Pluggable')
 
 
 class Plugin(Generic[_P]):
+    __slots__ = ()
+
     name: Optional[str] = None
 
     def __call__(self, pluggable: _P) -> None:
@@ -26,9 +28,11 @@ class Plugin(Generic[_P]):
 class Pluggable:
     def __init__(self: _P) -> None:
         self._plugins: Dict[str, Plugin[_P]] = {}
+        self._dispatchers: Dict[Tuple[str, bool, bool], Callable[..., Any]] = {}
 
     def register_plugin(self: _P, name: str, plugin: Plugin[_P]) -> None:
         self._plugins[name] = plugin
+        self._dispatchers.clear()
 
     def _get_plugins(self: _P, reverse: bool = False) -> List[Plugin[_P]]:
         plugins = list(self._plugins.values())
@@ -36,27 +40,54 @@ class Pluggable:
             plugins.reverse()
         return plugins
 
-    def _run_plugins(
-        self, func: str, args: List[Any], wrap_first: bool, reverse: bool
-    ) -> Generator[Any, Any, None]:
-        for plugin in self._get_plugins(reverse):
-            try:
-                result = yield getattr(plugin, func)(*args)
-            except Exception:
-                log.error(f'Error in plugin {plugin._name!r}')
-                raise
-            if wrap_first:
-                args[0] = result
+    def _make_dispatcher(
+        self, func: str, wrap_first: bool, reverse: bool
+    ) -> Callable[..., Any]:
+        plugins = self._get_plugins(reverse)
+        if not plugins:
+            return _return_first if wrap_first else _noop
+        hooks = [(plugin._name, getattr(plugin, func)) for plugin in plugins]
+        if len(hooks) == 1:
+            ((name, hook),) = hooks
+
+            def dispatch_single(*args: Any) -> Any:
+                try:
+                    result = hook(*args)
+                except Exception:
+                    log.error(f'Error in plugin {name!r}')
+                    raise
+                return result if wrap_first else None
+
+            return dispatch_single
+
+        def dispatch(*args: Any) -> Any:
+            arg_list = list(args)
+            for name, hook in hooks:
+                try:
+                    result = hook(*arg_list)
+                except Exception:
+                    log.error(f'Error in plugin {name!r}')
+                    raise
+                if wrap_first:
+                    arg_list[0] = result
+            return arg_list[0] if wrap_first else None
+
+        return dispatch
 
     def run_plugins(
         self, func: str, *args: Any, wrap_first: bool = False, reverse: bool = False
     ) -> Any:
-        arg_list = list(args)
-        gen = self._run_plugins(func, arg_list, wrap_first, reverse)
-        result: Any = None
+        key = func, wrap_first, reverse
         try:
-            while True:
-                result = gen.send(result)
-        except StopIteration:
-            if wrap_first:
-                return arg_list[0]
+            dispatch = self._dispatchers[key]
+        except KeyError:
+            dispatch = self._dispatchers[key] = self._make_dispatcher(*key)
+        return dispatch(*args)
+
+
+def _noop(*args: Any) -> None:
+    pass
+
+
+def _return_first(first: _T, *args: Any) -> _T:
+    return first
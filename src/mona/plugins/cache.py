@@ -336,7 +336,11 @@ class Cache(SessionPlugin):
 
     @classmethod
     def from_path(cls, path: Pathable, **kwargs: Any) -> Cache:
-        """Create a cache with a database at the given path."""
+        """Create a cache with a database at the given path.
+
+        With ``':memory:'``, task results are memoized only across sessions
+        sharing the cache within the process.
+        """
         db = sqlite3.connect(path)
         db.execute(
             """\
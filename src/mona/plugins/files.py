@@ -1,19 +1,24 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
-import hashlib
+import os
 import shutil
+import time
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, Tuple, Union
 
 from ..errors import FilesError
 from ..files import FileManager as _FileManager
-from ..hashing import Hash
+from ..hashing import Hash, hash_file, hash_text
 from ..sessions import Session, SessionPlugin
 from ..utils import Pathable, make_nonwritable, make_writable
 
 __version__ = '0.2.0'
 
+_Stamp = Tuple[str, int, int, int, int, int]
+# generous bound on the timestamp granularity of file systems (FAT has 2 s)
+_MTIME_TICK_NS = 2_000_000_000
+
 
 class FileManager(_FileManager, SessionPlugin):
     """Plugin that manages storage of abstract task files in a file system."""
@@ -23,7 +28,7 @@ class FileManager(_FileManager, SessionPlugin):
     def __init__(self, root: Union[str, Pathable], eager: bool = True) -> None:
         self._root = Path(root).resolve()
         self._cache: Dict[Hash, bytes] = {}
-        self._path_cache: Dict[Path, Hash] = {}
+        self._stamp_cache: Dict[_Stamp, Hash] = {}
         self._eager = eager
 
     def __repr__(self) -> str:
@@ -52,7 +57,7 @@ class FileManager(_FileManager, SessionPlugin):
         make_nonwritable(stored_path)
 
     def store_bytes(self, content: bytes) -> Hash:  # noqa: D102
-        hashid = Hash(hashlib.sha1(content).hexdigest())
+        hashid = hash_text(content)
         if hashid not in self:
             self._cache[hashid] = content
             if self._eager:
@@ -68,23 +73,31 @@ class FileManager(_FileManager, SessionPlugin):
         make_nonwritable(stored_path)
 
     def store_path(self, path: Path, *, keep: bool) -> Hash:  # noqa: D102
-        hashid = self._path_cache.get(path)
+        # a file with an unchanged stamp need not be read and hashed again
+        st = path.stat()
+        stamp = (
+            os.path.abspath(path),
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_ctime_ns,
+        )
+        hashid = self._stamp_cache.get(stamp)
         if hashid:
             return hashid
-        sha1 = hashlib.sha1()
-        with path.open('rb') as f:
-            while True:
-                data = f.read(2 ** 20)
-                if not data:
-                    break
-                sha1.update(data)
-        hashid = Hash(sha1.hexdigest())
+        # a file changed within the current timestamp tick may change again
+        # without changing its stamp, as may a recycled inode at the same path
+        racy = max(st.st_mtime_ns, st.st_ctime_ns) > time.time_ns() - _MTIME_TICK_NS
+        hashid = hash_file(path)
         if hashid not in self:
             # TODO this is not good with large files
             self._cache[hashid] = path.read_bytes()
             if self._eager:
                 self._store_path(hashid, path, keep)
-        return self._path_cache.setdefault(path, hashid)
+        if not racy:
+            self._stamp_cache[stamp] = hashid
+        return hashid
 
     def bytes_for(self, hashid: Hash) -> bytes:  # noqa: D102
         try:
@@ -113,5 +126,11 @@ class FileManager(_FileManager, SessionPlugin):
             path.symlink_to(stored_path)
 
     def store_cache(self) -> None:  # noqa: D102
-        for hashid, content in self._cache.items():
-            self._store_bytes(hashid, content)
+        # stored files are content-addressed, so existing ones are up to date
+        paths = {hashid: self._path(hashid) for hashid in self._cache}
+        paths = {hashid: path for hashid, path in paths.items() if not path.is_file()}
+        for parent in {path.parent for path in paths.values()}:
+            parent.mkdir(exist_ok=True)
+        for hashid, path in paths.items():
+            path.write_bytes(self._cache[hashid])
+            make_nonwritable(path)
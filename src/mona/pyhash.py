@@ -11,7 +11,7 @@ from pathlib import Path
 from textwrap import dedent
 from types import CodeType, ModuleType
 import typing
-from typing import Any, Callable, Dict, Optional, TypeVar, cast
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, cast
 
 from .errors import CompositeError, HashingError
 from .hashing import Hash, Hashed, HashedComposite, hash_text
@@ -24,6 +24,11 @@ _T = TypeVar('_T')
 # Travis duplicates some stdlib modules in virtualenv
 _stdlib_paths = [str(Path(m.__file__).parent) for m in [os, ast]]
 _cache: Dict[Callable[..., Any], Hash] = {}
+# code objects are immutable, so the normalized AST of a function can be shared
+# by all function objects created from the same code, unlike its globals. Keyed
+# by identity, because equal code objects can come from different sources; the
+# stored code object keeps its id from being reused.
+_ast_cache: Dict[int, Tuple[CodeType, str]] = {}
 
 
 def is_stdlib(mod: ModuleType) -> bool:
@@ -52,27 +57,31 @@ def hash_function(func: Callable[..., Any]) -> Hash:
 
 
 def ast_code_of(func: Callable[..., Any]) -> str:
+    code = func.__code__
+    entry = _ast_cache.get(id(code))
+    if entry and entry[0] is code:
+        return entry[1]
     lines = dedent(inspect.getsource(func)).split('\n')
     lines = list(dropwhile(lambda l: l[0] == '@', lines))
-    code = '\n'.join(lines)
-    module: Any = ast.parse(code)
+    module: Any = ast.parse('\n'.join(lines))
     assert len(module.body) == 1
     assert isinstance(module.body[0], (ast.FunctionDef))
     for node in ast.walk(module):
         remove_docstring(node)
     func_node = module.body[0]
     func_node.name = ''  # clear function's name
-    return ast.dump(func_node, annotate_fields=False)
+    ast_code = ast.dump(func_node, annotate_fields=False)
+    _ast_cache[id(code)] = code, ast_code
+    return ast_code
 
 
 def remove_docstring(node: ast.AST) -> None:
-    classes = ast.FunctionDef, ast.ClassDef, ast.Module
+    classes = ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Module
     if not isinstance(node, classes):
         return
-    if not (node.body and isinstance(node.body[0], ast.Expr)):
-        return
-    docstr = node.body[0].value
-    if isinstance(docstr, ast.Str):
+    # get_docstring() tracks how string constants are represented in the AST
+    # across Python versions, unlike checking for ast.Str
+    if ast.get_docstring(node, clean=False) is not None:
         node.body.pop(0)
 
 
@@ -85,9 +85,12 @@ def _run_process(
 ) -> Union[bytes, Tuple[bytes, bytes]]:
     kwargs.setdefault('stdin', subprocess.PIPE)
     kwargs.setdefault('stdout', subprocess.PIPE)
-    kwargs.setdefault('env', os.environ.copy())
     if ncores is not None:
-        kwargs['env']['MONA_NCORES'] = str(ncores)
+        # without a custom variable, the child simply inherits the environment
+        env = kwargs.get('env')
+        if env is None:
+            env = os.environ
+        kwargs['env'] = {**env, 'MONA_NCORES': str(ncores)}
     if shell:
         assert isinstance(args, str)
         proc = subprocess.Popen(args, shell=True, **kwargs)
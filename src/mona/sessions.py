@@ -5,22 +5,22 @@ from __future__ import annotations
 
 import logging
 import warnings
-from collections import defaultdict
 from contextlib import contextmanager
 from contextvars import ContextVar
 from functools import wraps
 from itertools import chain
+from operator import attrgetter
 from typing import (
     Any,
     Callable,
     Dict,
-    FrozenSet,
     Iterable,
     Iterator,
     List,
     NamedTuple,
     Optional,
     Sequence,
+    Set,
     Tuple,
     TypeVar,
     Union,
@@ -56,12 +56,21 @@ TaskExecutor = NodeExecutor[ATask]
 ExceptionHandler = Callable[[ATask, Exception], bool]
 TaskFilter = Callable[[ATask], bool]
 
+_hashid_of = attrgetter('hashid')
+
+_DOT_NODE = '\t"{}" [label="{}"{}]'
+_DOT_EDGE = '\t"{}" -> "{}"{}'
+_DOT_SIDE_EFFECT = ' [style=dotted]'
+_DOT_BACKFLOW = ' [arrowtail=none dir=back penwidth=7 style=tapered]'
+
 _active_session: ContextVar[Optional[Session]] = ContextVar(
     'active_session', default=None
 )
 
 
 class SessionPlugin(Plugin['Session']):
+    __slots__ = ()
+
     def post_enter(self, sess: Session) -> None:
         pass
 
@@ -91,12 +100,27 @@ class SessionPlugin(Plugin['Session']):
 
 
 class SessionGraph(NamedTuple):
-    deps: Dict[Hash, FrozenSet[Hash]]
+    deps: Dict[Hash, Tuple[Hash, ...]]
     side_effects: Dict[Hash, List[Hash]]
-    backflow: Dict[Hash, FrozenSet[Hash]]
+    backflow: Dict[Hash, Tuple[Hash, ...]]
 
 
 class TraversalManager:
+    __slots__ = (
+        '_edges_from',
+        '_execute',
+        '_limit',
+        '_limit_reached',
+        '_exceptions',
+        '_n_executed',
+        '_wont_schedule',
+        '_filtered',
+        '_append_filtered_to',
+        'edges_from',
+        'execute',
+        'handle_exception',
+    )
+
     def __init__(
         self,
         edges_from: Callable[[ATask], Iterable[ATask]],
@@ -107,26 +131,57 @@ class TraversalManager:
     ):
         self._edges_from = edges_from
         self._execute = execute
-        self._exc_handler = exception_handler
-        self._task_filter = task_filter
         self._limit = limit
         self._limit_reached = False
         self._exceptions: Dict[ATask, Exception] = {}
         self._n_executed = 0
         self._wont_schedule: List[ATask] = []
         self._filtered: List[ATask] = []
+        # specialize the per-task methods once instead of branching per call
+        self._append_filtered_to: Callable[[List[ATask], ATask], None] = (
+            self._append_to
+            if task_filter is None
+            else self._make_append_with_filter_to(task_filter)
+        )
+        self.edges_from: Callable[[ATask], List[ATask]] = (
+            self._edges_from_unfiltered
+            if task_filter is None
+            else self._edges_from_filtered
+        )
+        self.execute: TaskExecutor = (
+            self._execute_unlimited if limit is None else self._execute_limited
+        )
+        self.handle_exception: Callable[[ATask, Exception], None] = (
+            self._raise_exception
+            if exception_handler is None
+            else self._make_handle_exception(exception_handler)
+        )
 
-    def _append_filtered_to(self, tasks: List[ATask], task: ATask) -> None:
-        if self._task_filter and not self._task_filter(task):
-            self._filtered.append(task)
-        else:
-            tasks.append(task)
+    def _append_to(self, tasks: List[ATask], task: ATask) -> None:
+        tasks.append(task)
+
+    def _make_append_with_filter_to(
+        self, task_filter: TaskFilter
+    ) -> Callable[[List[ATask], ATask], None]:
+        filtered = self._filtered
+
+        def append_with_filter_to(tasks: List[ATask], task: ATask) -> None:
+            if task_filter(task):
+                tasks.append(task)
+            else:
+                filtered.append(task)
 
-    def edges_from(self, task: ATask) -> List[ATask]:
+        return append_with_filter_to
+
+    def _edges_from_unfiltered(self, task: ATask) -> List[ATask]:
+        return [t for t in self._edges_from(task) if not t.done()]
+
+    def _edges_from_filtered(self, task: ATask) -> List[ATask]:
+        append_filtered_to = self._append_filtered_to
         tasks: List[ATask] = []
         for task in self._edges_from(task):
             if not task.done():
-                self._append_filtered_to(tasks, task)
+                append_filtered_to(tasks, task)
         return tasks
 
     def schedule(self, task: ATask, register: Callable[[ATask], None]) -> None:
@@ -135,7 +190,7 @@ class TraversalManager:
         else:
             self._wont_schedule.append(task)
 
-    def execute(self, task: ATask, done: TaskExecuted) -> bool:
+    def _execute_unlimited(self, task: ATask, done: TaskExecuted) -> bool:
         def _done(execute_results: NodeResult[ATask]) -> None:
             n, e, candidates = execute_results
             tasks: List[ATask] = []
@@ -143,27 +198,40 @@ class TraversalManager:
                 self._append_filtered_to(tasks, task)
             done((n, e, tasks))
 
-        if self._limit is not None:
-            assert self._n_executed <= self._limit
-            if self._n_executed == self._limit:
-                self._limit_reached = True
-                return False
-            elif self._n_executed == self._limit - 1:
-                log.info('Maximum number of executed tasks reached')
-        self._n_executed += 1
         log.info(f'{task}: will run')
         assert self._execute(task, _done)
         return True
 
-    def handle_exception(self, task: ATask, exc: Exception) -> None:
-        if isinstance(exc, (MonaError, AssertionError)):
-            raise exc
-        assert isinstance(exc, Exception)
-        if self._exc_handler and self._exc_handler(task, exc):
-            self._exceptions[task] = exc
-            log.info(f'Handled {exc!r} from {task!r}')
-        else:
-            raise exc
+    def _execute_limited(self, task: ATask, done: TaskExecuted) -> bool:
+        assert self._limit is not None
+        assert self._n_executed <= self._limit
+        if self._n_executed == self._limit:
+            self._limit_reached = True
+            return False
+        elif self._n_executed == self._limit - 1:
+            log.info('Maximum number of executed tasks reached')
+        self._n_executed += 1
+        return self._execute_unlimited(task, done)
+
+    def _raise_exception(self, task: ATask, exc: Exception) -> None:
+        raise exc
+
+    def _make_handle_exception(
+        self, exception_handler: ExceptionHandler
+    ) -> Callable[[ATask, Exception], None]:
+        exceptions = self._exceptions
+
+        def handle_exception(task: ATask, exc: Exception) -> None:
+            if isinstance(exc, (MonaError, AssertionError)):
+                raise exc
+            assert isinstance(exc, Exception)
+            if exception_handler(task, exc):
+                exceptions[task] = exc
+                log.info(f'Handled {exc!r} from {task!r}')
+            else:
+                raise exc
+
+        return handle_exception
 
     def has_filtered(self) -> bool:
         return bool(self._filtered)
@@ -209,7 +277,10 @@ class Session(Pluggable):
         for plugin in plugins or ():
             plugin(self)
         self._tasks: Dict[Hash, ATask] = {}
-        self._graph = SessionGraph({}, defaultdict(list), {})
+        self._saved_hashes: Set[Hash] = set()
+        self._graph = SessionGraph({}, {}, {})
+        # not a plain attribute, as the Parallel plugin runs tasks concurrently
+        # in separate threads, each of which needs to see its own running task
         self._running_task: ContextVar[Optional[ATask]] = ContextVar(
             'running_task', default=None
         )
@@ -229,7 +300,9 @@ class Session(Pluggable):
 
     def side_effects_of(self, task: ATask) -> Iterable[ATask]:
         """Return tasks created by a given task."""
-        return tuple(self._tasks[h] for h in self._graph.side_effects[task.hashid])
+        return tuple(
+            self._tasks[h] for h in self._graph.side_effects.get(task.hashid, ())
+        )
 
     def all_tasks(self) -> Iterable[ATask]:
         """Return all tasks created in session."""
@@ -253,6 +326,7 @@ class Session(Pluggable):
             if tasks_not_run:
                 warnings.warn(f'tasks have never run: {tasks_not_run}', RuntimeWarning)
         self._tasks.clear()
+        self._saved_hashes.clear()
         self._storage.clear()
         self._graph.deps.clear()
         self._graph.side_effects.clear()
@@ -266,42 +340,48 @@ class Session(Pluggable):
             return task
         raise SessionError(f'No running task: {self!r}', self)
 
-    @contextmanager
-    def _running_task_ctx(self, task: ATask) -> Iterator[None]:
-        assert not self._running_task.get()
-        self._running_task.set(task)
-        try:
-            yield
-        finally:
-            assert self._running_task.get() is task
-            self._running_task.set(None)
-
-    def _process_objects(self, objs: Iterable[Hashed[object]]) -> List[ATask]:
-        objs = list(
-            traverse(objs, lambda o: o.components if not isinstance(o, Task) else [])
-        )
-        tasks, objs = split(objs, Task)
+    def _process_objects(self, objs: Sequence[Hashed[object]]) -> List[ATask]:
+        tasks: List[ATask]
+        if all(isinstance(o, Task) for o in objs):
+            # tasks are not traversed into, so there is nothing to walk
+            tasks, objs = cast(List[ATask], list(objs)), []
+        else:
+            tasks, objs = split(
+                traverse(
+                    objs, lambda o: o.components if not isinstance(o, Task) else ()
+                ),
+                Task,
+            )
+        in_session = self._tasks.__contains__
         for task in tasks:
-            if task.hashid not in self._tasks:
+            if not in_session(task.hashid):
                 raise TaskError(f'Not in session: {task!r}', task)
-        self.run_plugins('save_hashed', objs)
+        if not objs:
+            return tasks
+        saved = self._saved_hashes
+        # equal objects can also occur several times within one call
+        new = {o.hashid: o for o in objs if o.hashid not in saved}
+        if new:
+            saved.update(new)
+            self.run_plugins('save_hashed', list(new.values()))
         return tasks
 
     def register_task(self, task: Task[_T]) -> Tuple[Task[_T], bool]:
         """Register a task in a session."""
+        hashid = task.hashid
         try:
-            return cast(Task[_T], self._tasks[task.hashid]), False
+            return cast(Task[_T], self._tasks[hashid]), False
         except KeyError:
             pass
-        self._tasks[task.hashid] = task
+        self._tasks[hashid] = task
         task.register()
         arg_tasks = self._process_objects(task.args)
-        self._graph.deps[task.hashid] = frozenset(t.hashid for t in arg_tasks)
+        self._graph.deps[hashid] = tuple(dict.fromkeys(map(_hashid_of, arg_tasks)))
         return task, True
 
     def add_side_effect_of(self, caller: ATask, callee: ATask) -> None:
         """Register a task created by a task."""
-        self._graph.side_effects[caller.hashid].append(callee.hashid)
+        self._graph.side_effects.setdefault(caller.hashid, []).append(callee.hashid)
 
     def create_task(
         self, func: Callable[..., _T], *args: Any, **kwargs: Any
@@ -354,7 +434,10 @@ class Session(Pluggable):
             result.add_done_callback(lambda fut: task.set_done())
             result.register()
         backflow = self._process_objects([result])
-        self._graph.backflow[task.hashid] = frozenset(t.hashid for t in backflow)
+        if backflow:
+            self._graph.backflow[task.hashid] = tuple(
+                dict.fromkeys(map(_hashid_of, backflow))
+            )
 
     def _run_task(self, task: Task[_T]) -> Union[_T, Hashed[_T]]:
         if task.state < State.READY:
@@ -362,8 +445,11 @@ class Session(Pluggable):
         if task.state > State.READY:
             raise TaskError(f'Task was already run: {task!r}', task)
         task.set_running()
-        with self._running_task_ctx(task):
+        token = self._running_task.set(task)
+        try:
             raw_result = task.func(*(arg.value for arg in task.args))
+        finally:
+            self._running_task.reset(token)
         task.set_has_run()
         side_effects = self.side_effects_of(task)
         if side_effects:
@@ -375,7 +461,9 @@ class Session(Pluggable):
 
     def _traverse_execute(self, task: ATask, done: TaskExecuted) -> bool:
         self._run_task(task)
-        backflow = (self._tasks[h] for h in self._graph.backflow.get(task.hashid, ()))
+        backflow = map(
+            self._tasks.__getitem__, self._graph.backflow.get(task.hashid, ())
+        )
         done((task, None, backflow))
         return True
 
@@ -408,13 +496,19 @@ class Session(Pluggable):
         if not isinstance(fut, HashedFuture):
             return obj
         fut.register()
+        get_task = self._tasks.__getitem__
+        deps = self._graph.deps
+        get_backflow = self._graph.backflow.get
+
+        def edges_from(t: ATask) -> List[ATask]:
+            h = t.hashid
+            backflow = get_backflow(h)
+            if backflow is None:
+                return [get_task(x) for x in deps[h]]
+            return [get_task(x) for x in chain(deps[h], backflow)]
+
         mngr = TraversalManager(
-            lambda t: (
-                self._tasks[h]
-                for h in chain(
-                    self._graph.deps[t.hashid], self._graph.backflow.get(t.hashid, [])
-                )
-            ),
+            edges_from,
             self.run_plugins('wrap_execute', self._traverse_execute, wrap_first=True),
             exception_handler,
             task_filter,
@@ -462,29 +556,40 @@ class Session(Pluggable):
         with self.run_context():
             return self._eval(*args, **kwargs)
 
+    def _iter_dot_lines(self) -> Iterator[str]:
+        # format DOT statements directly, always quoting hash IDs
+        side_effects = self._graph.side_effects
+        backflow = self._graph.backflow
+        for child, parents in self._graph.deps.items():
+            task_obj = self._tasks[child]
+            label = repr(Literal(task_obj)).replace('"', '\\"')
+            color = STATE_COLORS[task_obj.state]
+            color_attr = f' color={color}' if color else ''
+            yield _DOT_NODE.format(child, label, color_attr)
+            for parent in parents:
+                yield _DOT_EDGE.format(child, parent, '')
+            for task in side_effects.get(child, ()):
+                yield _DOT_EDGE.format(child, task, _DOT_SIDE_EFFECT)
+            for task in backflow.get(child, ()):
+                yield _DOT_EDGE.format(task, child, _DOT_BACKFLOW)
+
+    def dot_source(self) -> Iterator[str]:
+        """Generate lines of the DOT source of the task DAG.
+
+        Unlike :meth:`dot_graph`, this does not require :mod:`graphviz` and
+        the lines can be written out as they are generated.
+        """
+        yield 'digraph {\n'
+        for line in self._iter_dot_lines():
+            yield line + '\n'
+        yield '}\n'
+
     def dot_graph(self, *args: Any, **kwargs: Any) -> Any:
         """Generate :class:`~graphviz.Digraph` for the task DAG."""
         from graphviz import Digraph  # type: ignore
 
         dot = Digraph(*args, **kwargs)
-        for child, parents in self._graph.deps.items():
-            task_obj = self._tasks[child]
-            dot.node(child, repr(Literal(task_obj)), color=STATE_COLORS[task_obj.state])
-            for parent in parents:
-                dot.edge(child, parent)
-        for origin, tasks in self._graph.side_effects.items():
-            for task in tasks:
-                dot.edge(origin, task, style='dotted')
-        for target, tasks in self._graph.backflow.items():
-            for task in tasks:
-                dot.edge(
-                    task,
-                    target,
-                    style='tapered',
-                    penwidth='7',
-                    dir='back',
-                    arrowtail='none',
-                )
+        dot.body.extend(self._iter_dot_lines())
         return dot
 
     @classmethod
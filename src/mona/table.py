@@ -23,9 +23,10 @@ def align(s: str, align: str, width: int) -> str:
     if l >= width:
         return s
     if align == '<':
-        s = s + (width - l) * ' '
+        # lenstr may report a length different from the number of characters
+        s = s.ljust(width + str.__len__(s) - l)
     elif align == '>':
-        s = (width - l) * ' ' + s
+        s = s.rjust(width + str.__len__(s) - l)
     elif align == '|':
         s = (-(l - width) // 2) * ' ' + s + ((width - l) // 2) * ' '
     return s
@@ -61,10 +62,8 @@ class Table:
         if len(set(col_nums)) != 1:
             raise ValueError(f'Unequal column lengths: {col_nums}')
         col_num = col_nums[0]
-        cells_widths = [
-            [len(cell) for cell in row] for free, row in self._rows if not free
-        ]
-        col_widths = [max(cws) for cws in zip(*cells_widths)]
+        columns = zip(*(row for free, row in self._rows if not free))
+        col_widths = [max(map(len, col)) for col in columns]
         if isinstance(self._sep, list):
             seps = self._sep
         else:
@@ -80,8 +79,9 @@ class Table:
                 lines += row[0]
             else:
                 cells = starmap(align, zip(row, aligns, col_widths))
-                lines.append(
-                    self._indent
-                    + ''.join(chain.from_iterable(zip(cells, seps))).rstrip()
-                )
+                if isinstance(self._sep, list):
+                    line = ''.join(chain.from_iterable(zip(cells, seps)))
+                else:
+                    line = self._sep.join(cells)
+                lines.append(self._indent + line.rstrip())
         return '\n'.join(lines)
@@ -3,6 +3,7 @@ import pytest
 from mona import Rule, Session
 from mona.plugins import Cache, FileManager
 from tests.test_dirtask import analysis, calcs
+from tests.test_fib import fib
 from tests.test_files import calcs2
 
 
@@ -54,3 +55,15 @@ def test_pickled(db):
         sess.eval(get_object())
     with Session([Cache(db)]) as sess:
         assert type(get_object().value) is object
+
+
+def test_memory(mocker):
+    cache = Cache.from_path(':memory:')
+    sess = Session([cache])
+    with sess:
+        assert sess.eval(fib(10)) == 55
+    run_task = mocker.spy(sess, '_run_task')
+    with sess:
+        assert sess.eval(fib(10)) == 55
+    assert run_task.call_count == 0
+    cache.db.close()
@@ -1,8 +1,11 @@
+import re
 import subprocess
 
 import pytest
 
 from mona import Rule, Session, run_shell
+from mona.dag import traverse
+from mona.sessions import SessionPlugin
 
 
 @Rule
@@ -112,3 +115,60 @@ def test_stderr():
 
     with Session() as sess:
         assert int(sess.eval(f()[1])) == 5
+
+
+def test_traverse_diamond():
+    edges = {0: [1, 2], 1: [3], 2: [3], 3: []}
+    assert sorted(traverse([0], edges.__getitem__)) == [0, 1, 2, 3]
+    assert sorted(traverse([0], edges.__getitem__, depth=True)) == [0, 1, 2, 3]
+
+
+def test_hashed_saved_once():
+    class Saver(SessionPlugin):
+        def __init__(self):
+            self.saved = []
+
+        def save_hashed(self, objs):
+            self.saved.extend(o.hashid for o in objs)
+
+    @Rule
+    def f(x, y):
+        return x
+
+    saver = Saver()
+    with Session([saver]) as sess:
+        sess.eval([f(b'x', 1), f(b'x', 2)])
+        sess.eval(f(b'y', b'y'))
+        sess.eval(f([b'z'], [b'z']))
+    assert len(saver.saved) == len(set(saver.saved))
+
+
+def test_dot_source():
+    with Session() as sess:
+        sess.eval(identity(multi(5)))
+        lines = list(sess.dot_source())
+        assert ''.join(lines).splitlines() == sess.dot_graph().source.splitlines()
+    assert lines[0] == 'digraph {\n'
+    assert lines[-1] == '}\n'
+    labels, edges = {}, set()
+    for line in lines[1:-1]:
+        node = re.fullmatch(r'\t"(\w+)" \[label="(\w+): (.*)" color=green\]\n', line)
+        if node:
+            hashid, tag, label = node.groups()
+            assert hashid.startswith(tag)
+            labels[hashid] = label
+            continue
+        edge = re.fullmatch(r'\t"(\w+)" -> "(\w+)"(.*)\n', line)
+        assert edge
+        edges.add(edge.groups())
+    edges = {(labels[src], labels[dst], attrs) for src, dst, attrs in edges}
+    children = [f'identity({i})' for i in range(5)]
+    assert sorted(labels.values()) == sorted(
+        ['multi(5)', 'identity(multi(5))', *children]
+    )
+    backflow = ' [arrowtail=none dir=back penwidth=7 style=tapered]'
+    assert edges == {
+        ('identity(multi(5))', 'multi(5)', ''),
+        *(('multi(5)', child, ' [style=dotted]') for child in children),
+        *((child, 'multi(5)', backflow) for child in children),
+    }
@@ -1,3 +1,4 @@
+import os
 import shutil
 from pathlib import Path
 
@@ -121,3 +122,42 @@ def test_alt_input2(datafile, tmpdir):
             [File.from_path('data'), [Path('input'), 'data']],
         )
         assert int(sess.run_task(task).value['STDOUT'].read_text()) == 4
+
+
+def test_rewritten_path(tmpdir):
+    fmngr = FileManager(tmpdir)
+    path = Path(tmpdir) / 'data'
+    path.write_text('1')
+    hashid = fmngr.store_path(path, keep=True)
+    assert fmngr.store_path(path, keep=True) == hashid
+    path.write_text('22')
+    assert fmngr.store_path(path, keep=True) != hashid
+
+
+def test_shared_content():
+    with Session():
+        file = File.from_str('script', '#!/bin/bash\ntrue')
+    assert HashedFile(file).components == HashedFile(file).components
+
+
+def test_recycled_inode(tmpdir):
+    fmngr = FileManager(tmpdir)
+    path = Path(tmpdir) / 'data'
+    hashes = set()
+    for content in ['1', '2']:
+        path.write_text(content)
+        os.utime(path, ns=(0, 0))
+        hashes.add(fmngr.store_path(path, keep=True))
+        path.unlink()
+    assert len(hashes) == 2
+
+
+def test_stamp_cache(tmpdir, mocker):
+    fmngr = FileManager(tmpdir)
+    path = Path(tmpdir) / 'data'
+    path.write_text('1')
+    mocker.patch('mona.plugins.files.time.time_ns', return_value=1 << 62)
+    hash_file = mocker.patch('mona.plugins.files.hash_file', return_value='a' * 40)
+    fmngr.store_path(path, keep=True)
+    fmngr.store_path(path, keep=True)
+    assert hash_file.call_count == 1
@@ -1,3 +1,5 @@
+import linecache
+
 import pytest
 
 from mona.errors import HashingError
@@ -63,3 +65,16 @@ def test_unhashable():
 
     with pytest.raises(HashingError):
         hash_function(f)
+
+
+def test_same_code_different_source():
+    def compile_function(filename, source):
+        linecache.cache[filename] = (len(source), None, [source], filename)
+        namespace = {}
+        exec(compile(source, filename, 'exec'), namespace)
+        return namespace['f']
+
+    f1 = compile_function('<cell-1>', 'def f(x=1): return x\n')
+    f2 = compile_function('<cell-2>', 'def f(x=2): return x\n')
+    assert f1.__code__ == f2.__code__
+    assert hash_function(f1) != hash_function(f2)